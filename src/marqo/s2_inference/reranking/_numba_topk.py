@@ -0,0 +1,101 @@
+# optional numba-accelerated top-k selection over reranker scores.
+# numba is not a marqo dependency, so everything here degrades gracefully:
+# without it the selection falls back to heapq.nlargest (k < n) or numpy argsort
+import heapq
+
+import numpy as np
+
+from marqo.s2_inference.types import List, Union, ndarray
+from marqo.s2_inference.logger import get_logger
+logger = get_logger(__name__)
+
+try:
+    from numba import njit
+    _NUMBA_AVAILABLE = True
+except ImportError:
+    _NUMBA_AVAILABLE = False
+
+
+if _NUMBA_AVAILABLE:
+
+    @njit(cache=True)
+    def _topk_numba(scores, k):
+        """bounded min-heap selection of the k largest scores in O(n log k).
+        returns their indices ordered by descending score
+        """
+        n = scores.shape[0]
+        heap_scores = np.empty(k, dtype=scores.dtype)
+        heap_idx = np.empty(k, dtype=np.int64)
+        size = 0
+        for i in range(n):
+            s = scores[i]
+            if size < k:
+                # push and sift up
+                heap_scores[size] = s
+                heap_idx[size] = i
+                child = size
+                size += 1
+                while child > 0:
+                    parent = (child - 1)//2
+                    if heap_scores[child] < heap_scores[parent]:
+                        heap_scores[child], heap_scores[parent] = heap_scores[parent], heap_scores[child]
+                        heap_idx[child], heap_idx[parent] = heap_idx[parent], heap_idx[child]
+                        child = parent
+                    else:
+                        break
+            elif s > heap_scores[0]:
+                # replace the current minimum and sift down
+                heap_scores[0] = s
+                heap_idx[0] = i
+                parent = 0
+                while True:
+                    left = 2*parent + 1
+                    right = left + 1
+                    smallest = parent
+                    if left < size and heap_scores[left] < heap_scores[smallest]:
+                        smallest = left
+                    if right < size and heap_scores[right] < heap_scores[smallest]:
+                        smallest = right
+                    if smallest == parent:
+                        break
+                    heap_scores[parent], heap_scores[smallest] = heap_scores[smallest], heap_scores[parent]
+                    heap_idx[parent], heap_idx[smallest] = heap_idx[smallest], heap_idx[parent]
+                    parent = smallest
+
+        order = np.argsort(-heap_scores[:size])
+        return heap_idx[:size][order]
+
+
+def top_k_indices(scores: Union[List[float], ndarray], k: int = None) -> ndarray:
+    """indices of the k highest scores, highest score first.
+    k=None (or k >= len(scores)) returns the full descending ordering
+
+    Args:
+        scores (Union[List[float], ndarray]): _description_
+        k (int, optional): _description_. Defaults to None.
+
+    Returns:
+        ndarray: int64 indices into scores
+    """
+    scores = np.asarray(scores, dtype=np.float32)
+    n = scores.shape[0]
+
+    if k is None or k >= n:
+        return np.argsort(-scores)
+
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+
+    if _NUMBA_AVAILABLE:
+        return _topk_numba(scores, k)
+
+    return np.asarray(heapq.nlargest(k, range(n), key=scores.__getitem__), dtype=np.int64)
+
+
+if _NUMBA_AVAILABLE:
+    # warm the jit at import so the compile cost is not paid on the first query
+    try:
+        _topk_numba(np.zeros(2, dtype=np.float32), 1)
+    except Exception as e:
+        logger.warning(f"disabling numba top-k after warm-up failure: {e}")
+        _NUMBA_AVAILABLE = False
@@ -1,5 +1,8 @@
 from functools import partial
+import contextlib
 import functools
+import itertools
+import threading
 import validators
 import uuid
 from collections import defaultdict
@@ -9,6 +12,15 @@ pd.options.mode.chained_assignment = None
 import numpy as np
 import torch
 
+# tensor-based image transforms, only present in newer torchvision releases.
+# the owl reranker falls back to the hf processor's PIL pipeline without them
+try:
+    from torchvision.transforms import v2 as _tv_transforms_v2
+    from torchvision.transforms import InterpolationMode as _tv_InterpolationMode
+except ImportError:
+    _tv_transforms_v2 = None
+    _tv_InterpolationMode = None
+
 from marqo.s2_inference.types import *
 from marqo.s2_inference.reranking.model_utils import (
     load_sbert_cross_encoder_model,
@@ -22,6 +34,7 @@ from marqo.s2_inference.reranking.model_utils import (
     _keep_top_k
     )
 from marqo.s2_inference.errors import RerankerNameError
+from marqo.s2_inference.reranking._numba_topk import top_k_indices
 from marqo.s2_inference.clip_utils import load_image_from_path
 from marqo.s2_inference.reranking.enums import Columns, ResultsFields
 from marqo.s2_inference.reranking.configs import get_default_text_processing_parameters
@@ -152,11 +165,49 @@ class ReRanker:
     """
 
     def __init__(self, ):
-        pass 
+        # instances are shared across concurrent searches (rerank._get_reranker
+        # memoizes them) while rerank() works through per-call instance state,
+        # so every stateful rerank pass is serialised on this lock
+        self._rerank_lock = threading.Lock()
 
     def load_model(self):
         pass
 
+    @staticmethod
+    def _resolve_precision(precision: str, device: str) -> str:
+        """resolves the default precision for the forward pass. fp16 tensor-core
+        kernels on cuda, full fp32 on cpu (bf16 is opt-in there)
+
+        Args:
+            precision (str): one of 'fp16', 'bf16', 'fp32' or None for the default
+            device (str): _description_
+
+        Returns:
+            str: _description_
+        """
+        if precision is None:
+            return 'fp16' if 'cuda' in device else 'fp32'
+        if precision not in ('fp16', 'bf16', 'fp32'):
+            raise ValueError(f"expected one of fp16, bf16 or fp32 for precision but received {precision}")
+        return precision
+
+    def _autocast_context(self, cache_enabled: bool = True):
+        """context manager for the mixed-precision forward. a no-op for fp32
+        and for the non-torch backends which manage their own precision
+
+        Args:
+            cache_enabled (bool, optional): passed through to torch.autocast;
+                cuda graph capture requires the autocast weight cache disabled.
+                Defaults to True.
+
+        Returns:
+            _type_: _description_
+        """
+        if getattr(self, 'backend', 'torch') != 'torch' or self.precision == 'fp32':
+            return contextlib.nullcontext()
+        dtype = torch.float16 if self.precision == 'fp16' else torch.bfloat16
+        return torch.autocast(device_type=self.device.split(':')[0], dtype=dtype, cache_enabled=cache_enabled)
+
     def format_results(self, results: Dict, query: str = None, searchable_fields: List[str] = None):
         """standardize the way the results are formatted to go to a standard cross-encoder
 
@@ -183,19 +234,31 @@ class ReRanker:
         """
         return inputs_df[[query_column, content_column]].values.tolist()
 
-    def get_reranked_results(self, score_column: str = ResultsFields.reranker_score, 
-                            highlight_content_column: str = Columns.field_content):
+    def get_reranked_results(self, score_column: str = ResultsFields.reranker_score,
+                            highlight_content_column: str = Columns.field_content,
+                            final_key_names: bool = False):
         """reranks the updated results using the score in score_column
 
         Args:
             score_column (str, optional): _description_. Defaults to ResultsFields.reranker_score.
+            final_key_names (bool, optional): write the scores/highlights straight under
+                their final key names (and drop the internal rerank id), fusing what
+                cleanup_final_reranked_results would otherwise do in a second pass
+                over the hits. Defaults to False.
         """
         reranked_top = []
         for i,group in self.inputs_df.groupby(ResultsFields.reranked_id):
             group = group.sort_values(score_column, ascending=False).head(self.num_highlights)
             reranked_top.append(group)
         reranked_top = pd.concat(reranked_top).set_index(ResultsFields.reranked_id)
-        
+
+        if final_key_names:
+            score_key = ResultsFields.original_score
+            highlight_key = ResultsFields.highlights
+        else:
+            score_key = ResultsFields.reranker_score
+            highlight_key = ResultsFields.highlights_reranked
+
         # find out which document is the highest, then do the field as a highlight
         for result in self.results[ResultsFields.hits]:
             rerank_id = result[ResultsFields.reranked_id]
@@ -203,18 +266,29 @@ class ReRanker:
                 _score = reranked_top.loc[rerank_id][score_column]
             else:
                 _score = reranked_top.loc[rerank_id][score_column].values.tolist()
-                
-            result[ResultsFields.reranker_score] = _score
+
+            result[score_key] = _score
             _df = reranked_top.loc[rerank_id]
-             
+
             if self.num_highlights == 1:
                 _content = {_df[Columns.original_field_name]:_df[highlight_content_column]}
             else:
                 _content = [{row[Columns.original_field_name]:row[highlight_content_column]} for _,row in _df.iterrows()]
 
-            result[ResultsFields.highlights_reranked] = _content
+            result[highlight_key] = _content
+
+            if final_key_names:
+                result.pop(ResultsFields.reranked_id, None)
 
-        self.results[ResultsFields.hits] = sorted(self.results[ResultsFields.hits], key=lambda x:x[ResultsFields.reranker_score], reverse=True)
+        hits = self.results[ResultsFields.hits]
+        if self.num_highlights == 1:
+            # scalar scores: gather into a float32 buffer and let the compiled
+            # selection produce the final ordering instead of python's sorted(key=...)
+            scores = np.fromiter((h[score_key] for h in hits), dtype=np.float32, count=len(hits))
+            self.results[ResultsFields.hits] = [hits[i] for i in top_k_indices(scores)]
+        else:
+            # scores are per-highlight lists here, keep the lexicographic sort
+            self.results[ResultsFields.hits] = sorted(hits, key=lambda x:x[score_key], reverse=True)
 
     def rerank(self, query, results):
         # this gets filled on for the task (text/images)
@@ -225,8 +299,10 @@ class ReRankerText(ReRanker):
     """
     class for reranking with hf based text models
     """
-    def __init__(self, model_name: str, device: str = 'cpu', max_length: int = 512, num_highlights: int = 1, 
-                        split_params: Dict = get_default_text_processing_parameters()):
+    def __init__(self, model_name: str, device: str = 'cpu', max_length: int = 512, num_highlights: int = 1,
+                        split_params: Dict = get_default_text_processing_parameters(), backend: str = 'torch',
+                        char_cap: int = 512, batch_size: int = 128, precision: str = None,
+                        quantize: bool = False):
         super().__init__()
 
         self.model_name = model_name
@@ -235,8 +311,20 @@ class ReRankerText(ReRanker):
         self.num_highlights = num_highlights
         self.formatted_results = None
         self.split_params = split_params
+        self.backend = backend
+        self.char_cap = char_cap
+        self.batch_size = batch_size
+        self.precision = self._resolve_precision(precision, device)
+        self.quantize = quantize
         self.model = None
 
+        # captured cuda graphs keyed by (batch, seqlen), see _graphed_forward
+        self._cuda_graphs = {}
+        self._cuda_graphs_disabled = False
+
+        # reusable pinned-memory buffer for device-to-host score copies, grown on demand
+        self._score_buf = None
+
         self.split_length = None
         self.split_overlap = None
         self.split_method = None
@@ -251,8 +339,169 @@ class ReRankerText(ReRanker):
 
     def load_model(self) -> None:
 
-        self.model = load_sbert_cross_encoder_model(model_name=self.model_name, 
-                            device=self.device, max_length=self.max_length)['model']
+        # int8 dynamic quantization only applies to the torch backend on cpu
+        _quantize = self.quantize and self.device == 'cpu' and self.backend == 'torch'
+        self.model = load_sbert_cross_encoder_model(model_name=self.model_name,
+                            device=self.device, max_length=self.max_length, backend=self.backend,
+                            quantize=_quantize)['model']
+
+    def _prepare_rerank_inputs(self, query: str, results: Dict, searchable_attributes: List[str] = None) -> pd.DataFrame:
+        """runs the formatting stages of reranking and returns the inputs dataframe
+        that the model inputs are built from. split out from rerank so callers
+        (e.g. the micro-batching dispatcher) can prepare several results sets before
+        a single fused forward pass
+
+        Args:
+            query (str): _description_
+            results (Dict): _description_
+            searchable_attributes (List[str], optional): _description_. Defaults to None.
+
+        Returns:
+            pd.DataFrame: _description_
+        """
+        self.format_results(results)
+
+        # we need to create the pairs of data to score over
+        # if searchable attributes is None, then we do all non _ fields,
+        # otherwise search over the searchable attributes
+        if searchable_attributes is None:
+            searchable_attributes = self.formatted_results.searchable_fields
+        self.searchable_attributes = searchable_attributes
+
+        # first stage of formatting converts results dict to dataframe
+        inputs_df = self.formatted_results.format_for_model(self.formatted_results.results_df, searchable_attributes, query=query)
+
+        # truncate the candidate content before chunking/tokenization so the
+        # tokenizer work is bounded and the model sees larger effective batches.
+        # only the model inputs are capped, the original documents are untouched
+        if self.char_cap is not None and len(inputs_df) > 0:
+            inputs_df[Columns.field_content] = inputs_df[Columns.field_content].apply(
+                lambda content: content[:self.char_cap] if isinstance(content, str) else content)
+
+        # second stage (optionally) add more rows by splitting the content into sub-chunks and
+        # performing the apprpriate filling in of other values
+        if self.split_params is not None:
+            _n = len(inputs_df)
+            inputs_df = self.explode_nested_content_field(inputs_df)
+            logger.info(f"chunking field content, went from length {_n} to {len(inputs_df)}")
+
+        return inputs_df
+
+    def _predict(self, model_inputs: List[List[str]]) -> List[float]:
+        """runs the cross-encoder forward pass over the prepared inputs. when the
+        loaded model exposes its tokenizer and torch module (the torch backend),
+        the rows are scored through _score_query_docs so each distinct query is
+        tokenized once rather than once per row
+
+        Args:
+            model_inputs (List[List[str]]): _description_
+
+        Returns:
+            List[float]: _description_
+        """
+        tokenizer = getattr(self.model, 'tokenizer', None)
+        module = getattr(self.model, 'model', None)
+        if tokenizer is not None and isinstance(module, torch.nn.Module):
+            # rows sharing a query are contiguous: one query per rerank call, one
+            # run per call inside the dispatcher's fused batches
+            scores = []
+            for query, group in itertools.groupby(model_inputs, key=lambda pair: pair[0]):
+                scores += self._score_query_docs(query, [pair[1] for pair in group])
+            return scores
+
+        with torch.inference_mode(), self._autocast_context():
+            scores = self.model.predict(model_inputs, batch_size=self.batch_size)
+        return _convert_cross_encoder_output(scores)
+
+    def _score_query_docs(self, query: str, docs: List[str]) -> List[float]:
+        """tokenize-once scoring core shared by _predict and rerank_cached_query.
+        the query is encoded a single time and its token ids reused for every
+        (query, doc) row, which are built and forwarded in batch_size chunks.
+        assumes the model is loaded and exposes its tokenizer and torch module
+
+        Args:
+            query (str): _description_
+            docs (List[str]): _description_
+
+        Returns:
+            List[float]: one score per document
+        """
+        tokenizer = self.model.tokenizer
+        module = self.model.model
+
+        # encode the query once, the documents as one batched call. the documents
+        # are truncated to the room left beside the query and special tokens, so
+        # the assembled rows never need slicing that would chop the trailing [SEP]
+        query_ids = tokenizer.encode(query, add_special_tokens=False, truncation=True, max_length=self.max_length)
+        doc_budget = max(0, self.max_length - len(query_ids) - tokenizer.num_special_tokens_to_add(pair=True))
+        doc_ids_batch = tokenizer(docs, add_special_tokens=False, truncation=True, max_length=self.max_length)['input_ids']
+        doc_ids_batch = [doc_ids[:doc_budget] for doc_ids in doc_ids_batch]
+
+        # segment embeddings matter for the bert-family cross encoders, only
+        # skip them for models whose tokenizer does not produce them
+        use_token_types = 'token_type_ids' in getattr(tokenizer, 'model_input_names', [])
+
+        # on cuda each chunk's scores are scattered straight into the reusable
+        # pinned host buffer, so the whole call does one device sync and zero
+        # per-call host allocations
+        use_pinned = self.device.startswith('cuda')
+        buffer = self._ensure_score_buf(len(docs)) if use_pinned else None
+
+        chunks = []
+        with torch.inference_mode(), self._autocast_context():
+            for start in range(0, len(doc_ids_batch), self.batch_size):
+                chunk = doc_ids_batch[start:start + self.batch_size]
+
+                # [CLS] q [SEP] d [SEP] per row via the tokenizer's own
+                # special-token recipe, padded as a single matrix
+                rows = [torch.tensor(tokenizer.build_inputs_with_special_tokens(query_ids, doc_ids),
+                            dtype=torch.long) for doc_ids in chunk]
+                lengths = torch.tensor([len(row) for row in rows])
+                input_ids = torch.nn.utils.rnn.pad_sequence(rows, batch_first=True, padding_value=tokenizer.pad_token_id)
+                attention_mask = (torch.arange(input_ids.shape[1]).unsqueeze(0) < lengths.unsqueeze(1)).long()
+
+                token_type_ids = None
+                if use_token_types:
+                    type_rows = [torch.tensor(tokenizer.create_token_type_ids_from_sequences(query_ids, doc_ids),
+                                dtype=torch.long) for doc_ids in chunk]
+                    token_type_ids = torch.nn.utils.rnn.pad_sequence(type_rows, batch_first=True, padding_value=0)
+                    token_type_ids = token_type_ids.to(self.device)
+
+                logits = self._graphed_forward(module, input_ids.to(self.device),
+                            attention_mask.to(self.device), token_type_ids, tokenizer.pad_token_id)
+                scores = torch.sigmoid(logits.float().squeeze(-1))
+
+                if use_pinned:
+                    buffer[start:start + scores.shape[0]].copy_(scores, non_blocking=True)
+                else:
+                    chunks.append(scores)
+
+        if use_pinned:
+            # the copies into pinned memory are async, make sure they landed before reading
+            torch.cuda.synchronize()
+            return _convert_cross_encoder_output(buffer)
+
+        return _convert_cross_encoder_output(torch.cat(chunks))
+
+    def _apply_scores(self, scores: List[float], inputs_df: pd.DataFrame, results: Dict,
+                        final_key_names: bool = False) -> None:
+        """writes the model scores back against the inputs and reranks the results in place
+
+        Args:
+            scores (List[float]): _description_
+            inputs_df (pd.DataFrame): _description_
+            results (Dict): _description_
+            final_key_names (bool, optional): see get_reranked_results. Defaults to False.
+        """
+        self.results = results
+        self.scores = scores
+
+        inputs_df[ResultsFields.reranker_score] = scores
+        inputs_df[ResultsFields.hybrid_score_multiply] = np.clip(inputs_df[ResultsFields.original_score], 1e-3, np.inf)*np.clip(inputs_df[ResultsFields.reranker_score], 1e-3, np.inf)
+        inputs_df[ResultsFields.hybrid_score_add] = inputs_df[ResultsFields.original_score] + inputs_df[ResultsFields.reranker_score]
+        self.inputs_df = inputs_df
+
+        self.get_reranked_results(final_key_names=final_key_names)
 
     def explode_nested_content_field(self, inputs_df: pd.DataFrame) -> pd.DataFrame:
         """this is used to chunk the text content and then create a new entry for the model
@@ -279,75 +528,294 @@ class ReRankerText(ReRanker):
         
         return inputs_df
 
-    def rerank(self, query: str, results: Dict, searchable_attributes: List[str] = None) -> None:
+    def rerank(self, query: str, results: Dict, searchable_attributes: List[str] = None,
+                final_key_names: bool = False) -> None:
         """the main reranking method
 
         Args:
             query (str): _description_
             results (Dict): _description_
             searchable_attributes (List[str], optional): _description_. Defaults to None.
+            final_key_names (bool, optional): write scores/highlights under their final
+                key names directly, making the separate cleanup pass unnecessary.
+                Defaults to False.
 
         Raises:
             TypeError: _description_
             RuntimeError: _description_
         """
-        self.results = results
-        self.searchable_attributes = searchable_attributes
-
         if not isinstance(results, (dict, defaultdict)):
             raise TypeError(f"expected a dict or defaultdict, received {type(results)}")
 
         if len(results[ResultsFields.hits]) == 0:
             logger.warning("empty results for re-ranking. returning doing nothing...")
-            return 
+            return
 
-        if self.model is None:
-            self.load_model()
+        # the instance is shared between concurrent searches, serialise the
+        # stateful phases so one call cannot write into another call's results
+        with self._rerank_lock:
+            self.results = results
+            self.searchable_attributes = searchable_attributes
 
-        self.format_results(results)
+            if self.model is None:
+                self.load_model()
 
-        # we need to create the pairs of data to score over
-        # if searchable attributes is None, then we do all non _ fields, 
-        # otherwise search over the searchable attributes
-        if self.searchable_attributes is None:
-            self.searchable_attributes = self.formatted_results.searchable_fields
+            inputs_df = self._prepare_rerank_inputs(query, results, searchable_attributes)
 
-        # first stage of formatting converts results dict to dataframe
-        self.inputs_df = self.formatted_results.format_for_model(self.formatted_results.results_df, self.searchable_attributes, query=query)
-        
-        # second stage (optionally) add more rows by splitting the content into sub-chunks and
-        # performing the apprpriate filling in of other values
-        if self.split_params is not None:
-            _n = len(self.inputs_df)
-            self.inputs_df = self.explode_nested_content_field(self.inputs_df)
-            logger.info(f"chunking field content, went from length {_n} to {len(self.inputs_df)}")
-        
-        # final stage creates list of lists of strings to go straight to the model
-        self.model_inputs = self._prepare_inputs(self.inputs_df)
+            # final stage creates list of lists of strings to go straight to the model
+            self.model_inputs = self._prepare_inputs(inputs_df)
 
-        if not _verify_model_inputs(self.model_inputs):
-            raise RuntimeError(f"incorrect model inputs, expected list of lists but recevied {type(self.model_inputs)} and {type(self.model_inputs[0])}")
+            if not _verify_model_inputs(self.model_inputs):
+                raise RuntimeError(f"incorrect model inputs, expected list of lists but recevied {type(self.model_inputs)} and {type(self.model_inputs[0])}")
 
-        self.scores = self.model.predict(self.model_inputs)
-        self.scores = _convert_cross_encoder_output(self.scores)
+            scores = self._predict(self.model_inputs)
 
-        self.inputs_df[ResultsFields.reranker_score] = self.scores
-        self.inputs_df[ResultsFields.hybrid_score_multiply] = np.clip(self.inputs_df[ResultsFields.original_score], 1e-3, np.inf)*np.clip(self.inputs_df[ResultsFields.reranker_score], 1e-3, np.inf)
-        self.inputs_df[ResultsFields.hybrid_score_add] = self.inputs_df[ResultsFields.original_score] + self.inputs_df[ResultsFields.reranker_score]
+            self._apply_scores(scores, inputs_df, results, final_key_names=final_key_names)
 
-        self.get_reranked_results()
+    def rerank_pairs(self, query: str, results: Dict, pairs: Tuple[List[str], List[str]],
+                        top_k: int = None) -> None:
+        """low-overhead rerank path over prebuilt parallel (queries, docs) lists,
+        one fused document per hit. skips the dataframe formatting and the chunked
+        highlight computation of rerank, so the original highlights are kept.
+        scores are written onto the hits and the hits sorted in place
 
+        Args:
+            query (str): _description_
+            results (Dict): _description_
+            pairs (Tuple[List[str], List[str]]): (queries, docs) as built by
+                rerank._build_text_pairs
+            top_k (int, optional): keep only the k best hits, selected with an
+                O(N log k) heap instead of a full sort. None keeps all. Defaults to None.
+
+        Raises:
+            TypeError: _description_
+            RuntimeError: _description_
+        """
+        if not isinstance(results, (dict, defaultdict)):
+            raise TypeError(f"expected a dict or defaultdict, received {type(results)}")
+
+        hits = results[ResultsFields.hits]
+        if len(hits) == 0:
+            logger.warning("empty results for re-ranking. returning doing nothing...")
+            return
+
+        queries, docs = pairs
+        if len(queries) != len(hits) or len(docs) != len(hits):
+            raise RuntimeError(f"expected one (query, doc) pair per hit but received "
+                        f"{len(queries)} queries and {len(docs)} docs for {len(hits)} hits")
+
+        with self._rerank_lock:
+            if self.model is None:
+                self.load_model()
+
+            self.results = results
+            if self.char_cap is not None:
+                docs = [d[:self.char_cap] for d in docs]
+            self.model_inputs = [[q, d] for q, d in zip(queries, docs)]
+
+            scores = self._predict(self.model_inputs)
+            self.scores = scores
+
+        scores_np = np.asarray(scores, dtype=np.float32)
+        reranker_score = ResultsFields.reranker_score
+        for result, score in zip(hits, scores_np):
+            result[reranker_score] = float(score)
+
+        results[ResultsFields.hits] = [hits[i] for i in top_k_indices(scores_np, top_k)]
+
+    def rerank_cached_query(self, query: str, docs: List[str]) -> List[float]:
+        """scores (query, doc) pairs while tokenizing the query only once, saving
+        O(N) tokenizer work per call. this is the same scoring core _predict routes
+        through for the torch backend; the method stays public for callers holding
+        raw document strings. falls back to _predict when the loaded model does not
+        expose its tokenizer and torch module (the dummy and onnx/openvino
+        pipeline backends)
+
+        Args:
+            query (str): _description_
+            docs (List[str]): _description_
+
+        Returns:
+            List[float]: one score per document
+        """
+        with self._rerank_lock:
+            if self.model is None:
+                self.load_model()
+
+            if self.char_cap is not None:
+                docs = [doc[:self.char_cap] for doc in docs]
+
+            tokenizer = getattr(self.model, 'tokenizer', None)
+            module = getattr(self.model, 'model', None)
+            if tokenizer is None or not isinstance(module, torch.nn.Module):
+                return self._predict([[query, doc] for doc in docs])
+
+            return self._score_query_docs(query, docs)
+
+    def _ensure_score_buf(self, n: int):
+        """returns an n-length view of the reusable pinned-memory score buffer,
+        growing the underlying allocation when needed
+
+        Args:
+            n (int): _description_
+
+        Returns:
+            _type_: cpu float32 tensor view of length n
+        """
+        if self._score_buf is None or self._score_buf.shape[0] < n:
+            self._score_buf = torch.empty(max(n, self.batch_size), dtype=torch.float32, pin_memory=True)
+        return self._score_buf[:n]
+
+    # keep a bounded number of captured graphs, one per observed input shape
+    _max_cuda_graphs = 8
+
+    @staticmethod
+    def _module_forward(module, input_ids, attention_mask, token_type_ids):
+        """single forward through the sequence-classification module, passing the
+        segment ids only when the tokenizer produced them
+
+        Args:
+            module (_type_): _description_
+            input_ids (_type_): _description_
+            attention_mask (_type_): _description_
+            token_type_ids (_type_): None for models without segment embeddings
+
+        Returns:
+            _type_: the logits tensor
+        """
+        if token_type_ids is None:
+            return module(input_ids=input_ids, attention_mask=attention_mask).logits
+        return module(input_ids=input_ids, attention_mask=attention_mask, token_type_ids=token_type_ids).logits
+
+    def _graphed_forward(self, module, input_ids, attention_mask, token_type_ids, pad_token_id: int):
+        """forward through the sequence-classification module, replaying a captured
+        torch.cuda.CUDAGraph when one exists for the input shape. replay removes the
+        per-call kernel launch and python dispatch overhead which dominates
+        short-sequence prefill on cuda. the sequence dim is padded into buckets of 64
+        and the batch dim to the next power of two so a handful of shapes cover
+        the batches _score_query_docs produces. cpu devices, capture failures and
+        overflow of the graph cache all run the module directly
+
+        Args:
+            module (_type_): the underlying torch module
+            input_ids (_type_): _description_
+            attention_mask (_type_): _description_
+            token_type_ids (_type_): segment ids, None for models without them
+            pad_token_id (int): _description_
+
+        Returns:
+            _type_: the logits tensor
+        """
+        if not self.device.startswith('cuda') or self.backend != 'torch' or self._cuda_graphs_disabled:
+            return self._module_forward(module, input_ids, attention_mask, token_type_ids)
+
+        # pad the sequence length up to a fixed bucket so repeat calls share a shape
+        batch, seqlen = input_ids.shape
+        bucket = min(-(-seqlen//64) * 64, self.max_length)
+        if bucket > seqlen:
+            input_ids = torch.nn.functional.pad(input_ids, (0, bucket - seqlen), value=pad_token_id)
+            attention_mask = torch.nn.functional.pad(attention_mask, (0, bucket - seqlen), value=0)
+            if token_type_ids is not None:
+                token_type_ids = torch.nn.functional.pad(token_type_ids, (0, bucket - seqlen), value=0)
+
+        # bucket the batch dimension too (next power of two), otherwise every
+        # result-set size would capture its own graph and churn the bounded cache.
+        # pad rows attend to their first token only and their logits are dropped
+        batch_bucket = 1
+        while batch_bucket < batch:
+            batch_bucket *= 2
+        if batch_bucket > batch:
+            input_ids = torch.nn.functional.pad(input_ids, (0, 0, 0, batch_bucket - batch), value=pad_token_id)
+            mask_pad = torch.zeros((batch_bucket - batch, attention_mask.shape[1]),
+                        dtype=attention_mask.dtype, device=attention_mask.device)
+            mask_pad[:, 0] = 1
+            attention_mask = torch.cat([attention_mask, mask_pad])
+            if token_type_ids is not None:
+                token_type_ids = torch.nn.functional.pad(token_type_ids, (0, 0, 0, batch_bucket - batch), value=0)
+
+        key = (input_ids.shape[0], input_ids.shape[1])
+        if key not in self._cuda_graphs:
+            if len(self._cuda_graphs) >= self._max_cuda_graphs:
+                return self._module_forward(module, input_ids, attention_mask, token_type_ids)[:batch]
+            try:
+                static_ids = input_ids.clone()
+                static_mask = attention_mask.clone()
+                static_types = None if token_type_ids is None else token_type_ids.clone()
+
+                # warm-up and capture must run with the autocast weight cache
+                # disabled, torch rejects graph capture under a caching autocast
+                with self._autocast_context(cache_enabled=False):
+                    # warm up on a side stream before capture
+                    stream = torch.cuda.Stream()
+                    stream.wait_stream(torch.cuda.current_stream())
+                    with torch.cuda.stream(stream):
+                        for _ in range(3):
+                            self._module_forward(module, static_ids, static_mask, static_types)
+                    torch.cuda.current_stream().wait_stream(stream)
+
+                    graph = torch.cuda.CUDAGraph()
+                    with torch.cuda.graph(graph):
+                        static_out = self._module_forward(module, static_ids, static_mask, static_types)
+                self._cuda_graphs[key] = (graph, static_ids, static_mask, static_types, static_out)
+            except Exception as e:
+                if _is_cuda_oom(e):
+                    # transient allocator pressure, fall back for this call only
+                    logger.warning(f"cuda out of memory during graph capture for {self.model_name}, "
+                                f"running this forward uncaptured")
+                    torch.cuda.empty_cache()
+                else:
+                    logger.warning(f"disabling cuda graph capture for {self.model_name} after failure: {e}")
+                    self._cuda_graphs_disabled = True
+                return self._module_forward(module, input_ids, attention_mask, token_type_ids)[:batch]
+
+        graph, static_ids, static_mask, static_types, static_out = self._cuda_graphs[key]
+        static_ids.copy_(input_ids)
+        static_mask.copy_(attention_mask)
+        if static_types is not None:
+            static_types.copy_(token_type_ids)
+        graph.replay()
+        return static_out.clone()[:batch]
+
+
+def _is_cuda_oom(e: Exception) -> bool:
+    """whether an exception is the cuda allocator reporting out of memory.
+    torch only grew a dedicated OutOfMemoryError type in later releases, older
+    ones raise a plain RuntimeError
+
+    Args:
+        e (Exception): _description_
+
+    Returns:
+        bool: _description_
+    """
+    oom_type = getattr(torch.cuda, 'OutOfMemoryError', ())
+    return isinstance(e, oom_type) or (isinstance(e, RuntimeError) and 'out of memory' in str(e))
+
+# highest image batch size that fit in memory, learned per (model_name, image_size)
+# so later reranker instances start from a size known to work
+_owl_learned_batch_sizes = {}
 
 class ReRankerOwl(ReRanker):
-    
+
     """reranker for owl based image reranking
     """
 
-    def __init__(self, model_name: str, device: str, image_size: Tuple):
+    def __init__(self, model_name: str, device: str, image_size: Tuple, backend: str = 'torch',
+                        precision: str = None, image_batch_size: int = 32):
         super().__init__()
         self.device = device
         self.model_name = model_name
         self.image_size = image_size
+        if backend != 'torch':
+            logger.warning(f"backend={backend} is not supported for {model_name}. falling back to torch...")
+            backend = 'torch'
+        self.backend = backend
+        self.precision = self._resolve_precision(precision, device)
+        self._batch_size_key = (model_name, image_size)
+        self.image_batch_size = min(image_batch_size,
+                        _owl_learned_batch_sizes.get(self._batch_size_key, image_batch_size))
+        self._to_tensor = None
+        self._tensor_transform = None
         self.results = []
     
         self.model = None
@@ -375,12 +843,113 @@ class ReRankerOwl(ReRanker):
         }
 
     def load_model(self):
-        
+
         self._remapped_name = self._model_map[self.model_name]
         logger.info(f"loading model={self._remapped_name} from input name={self.model_name} to device {self.device}")
         loaded = load_owl_vit(self._remapped_name, device=self.device)
         self.model = loaded['model']
         self.processor = loaded['processor']
+        self._build_tensor_transform()
+
+    def _build_tensor_transform(self) -> None:
+        """builds the device-side replacement for the processor's PIL-based image
+        pipeline using the processor's own size/mean/std. leaves the transform as
+        None (PIL fallback) when torchvision v2 transforms are unavailable
+        """
+        if _tv_transforms_v2 is None:
+            return
+
+        image_processor = getattr(self.processor, 'image_processor', None) or \
+                            getattr(self.processor, 'feature_extractor', None)
+        if image_processor is None:
+            return
+
+        size = image_processor.size
+        if isinstance(size, (dict, defaultdict)):
+            size = (size.get('height', self.image_size[0]), size.get('width', self.image_size[1]))
+        elif isinstance(size, int):
+            size = (size, size)
+
+        transforms = [
+            _tv_transforms_v2.ToDtype(torch.float32, scale=True),
+            # the processor's PIL pipeline resizes with bicubic, match it so this
+            # path is numerically equivalent to the fallback it replaces
+            _tv_transforms_v2.Resize(size, interpolation=_tv_InterpolationMode.BICUBIC, antialias=True),
+        ]
+
+        # mirror the processor's center crop when its config enables one
+        if getattr(image_processor, 'do_center_crop', False):
+            crop_size = getattr(image_processor, 'crop_size', None) or size
+            if isinstance(crop_size, (dict, defaultdict)):
+                crop_size = (crop_size.get('height', size[0]), crop_size.get('width', size[1]))
+            elif isinstance(crop_size, int):
+                crop_size = (crop_size, crop_size)
+            transforms.append(_tv_transforms_v2.CenterCrop(crop_size))
+
+        transforms.append(_tv_transforms_v2.Normalize(mean=image_processor.image_mean, std=image_processor.image_std))
+
+        self._to_tensor = _tv_transforms_v2.ToImage()
+        self._tensor_transform = _tv_transforms_v2.Compose(transforms)
+
+    def _preprocess_images(self, images: List[ImageType]):
+        """preprocesses all loaded images on the device in image_batch_size chunks
+
+        Args:
+            images (List[ImageType]): _description_
+
+        Returns:
+            _type_: pixel values tensor of shape [N,3,H,W], or None when the
+                tensor transforms are unavailable and the PIL path should be used
+        """
+        if self._tensor_transform is None:
+            return None
+
+        batch_size = self.image_batch_size
+        while True:
+            try:
+                pixel_values = []
+                for start in range(0, len(images), batch_size):
+                    chunk = [self._tensor_transform(self._to_tensor(image).to(self.device))
+                                for image in images[start:start + batch_size]]
+                    pixel_values.append(torch.stack(chunk))
+                result = torch.cat(pixel_values)
+            except RuntimeError as e:
+                # halve the batch on oom until it fits, the learned size seeds later calls
+                if not _is_cuda_oom(e) or batch_size <= 1:
+                    raise
+                pixel_values = None
+                torch.cuda.empty_cache()
+                batch_size = batch_size//2
+                logger.warning(f"cuda out of memory during owl image preprocessing, "
+                            f"retrying with image_batch_size={batch_size}")
+                continue
+
+            self.image_batch_size = batch_size
+            _owl_learned_batch_sizes[self._batch_size_key] = batch_size
+            return result
+
+    def _safe_forward(self, processed_inputs):
+        """runs the owl forward, clearing the cuda cache and retrying once when the
+        allocator reports out of memory
+
+        Args:
+            processed_inputs (_type_): _description_
+
+        Returns:
+            _type_: _description_
+        """
+        try:
+            return _predict_owl(self.model, processed_inputs,
+                        post_process_function=self.processor.post_process,
+                        size=self.image_size)
+        except RuntimeError as e:
+            if not _is_cuda_oom(e):
+                raise
+            logger.warning("cuda out of memory during the owl forward, clearing the cache and retrying...")
+            torch.cuda.empty_cache()
+            return _predict_owl(self.model, processed_inputs,
+                        post_process_function=self.processor.post_process,
+                        size=self.image_size)
 
     @staticmethod
     def load_images(content: List[str], size: Tuple[int]) -> Tuple[ImageType, List[Tuple]]:
@@ -397,16 +966,22 @@ class ReRankerOwl(ReRanker):
         
         # TODO add image based reranking when it is available
         # https://github.com/huggingface/transformers/pull/20136
-        self.results = results
-        self.image_attributes = image_attributes
-        self.num_highlights = num_highlights
-
         if not isinstance(results, (dict, defaultdict)):
             raise TypeError(f"expected a dict or defaultdict, received {type(results)}")
 
         if len(results[ResultsFields.hits]) == 0:
             logger.warning("empty results for re-ranking. returning doing nothing...")
-            return 
+            return
+
+        # shared instance, see ReRanker.__init__
+        with self._rerank_lock:
+            self._rerank(query, results, image_attributes, num_highlights)
+
+    def _rerank(self, query: str, results: Dict, image_attributes: List, num_highlights: int) -> None:
+
+        self.results = results
+        self.image_attributes = image_attributes
+        self.num_highlights = num_highlights
 
         if self.model is None:
             self.load_model()
@@ -424,16 +999,23 @@ class ReRankerOwl(ReRanker):
 
         # try:
         self.images, self.original_sizes = self.load_images(image_names, self.image_size)
-        
+
+        # preprocess all images on the device in one batched pass where the tensor
+        # transforms are available, otherwise the processor's PIL pipeline is used per image
+        self.pixel_values = self._preprocess_images(self.images)
+
         # # TODO check query type before making a list
         _b, _s, _i, _bo = [], [], [], []
 
-        # # TODO find out why batching images does not work 
-        for image, content, _query, orig_size in zip(self.images, image_names, queries, self.original_sizes):
-            self.processed_inputs = _process_owl_inputs(self.processor, _query, image).to(self.device)
-            owl_results = _predict_owl(self.model, self.processed_inputs, 
-                                post_process_function=self.processor.post_process,
-                        size=self.image_size)
+        # # TODO find out why batching images does not work
+        for i, (image, content, _query, orig_size) in enumerate(zip(self.images, image_names, queries, self.original_sizes)):
+            if self.pixel_values is not None:
+                self.processed_inputs = _process_owl_inputs(self.processor, _query, None).to(self.device)
+                self.processed_inputs['pixel_values'] = self.pixel_values[i:i+1]
+            else:
+                self.processed_inputs = _process_owl_inputs(self.processor, _query, image).to(self.device)
+            with self._autocast_context():
+                owl_results = self._safe_forward(self.processed_inputs)
 
             boxes, scores, identifier = _process_owl_result(owl_results, content)
             boxes, scores, identifier = sort_owl_boxes_scores(boxes, scores, identifier)
@@ -1,16 +1,84 @@
 # use this as the entry point for reranking
+import asyncio
+import functools
+import threading
+from collections import defaultdict
+
 from marqo.s2_inference.reranking.enums import ResultsFields
 from marqo.s2_inference.reranking.cross_encoders import ReRankerText, ReRankerOwl
-from marqo.s2_inference.types import Dict, List
+from marqo.s2_inference.types import Dict, List, Tuple
 from marqo.s2_inference.errors import RerankerError, RerankerNameError
 from PIL import UnidentifiedImageError
 from marqo.s2_inference.logger import get_logger
 
 logger = get_logger(__name__)
 
-def rerank_search_results(search_result: Dict, query: str, model_name: str, device: str, 
-                searchable_attributes: List[str] = None, num_highlights: int = 1, 
-                overwrite_original_scores_highlights: bool = True) -> None:
+_reranker_load_lock = threading.Lock()
+
+# substring classifiers checked in order against the lowercased model name,
+# anything unmatched is handled by the default text reranker. extend this
+# instead of growing if/else chains when adding reranker types
+_RERANKER_CLASSIFIERS: Tuple[Tuple[str, type], ...] = (
+    ("owl", ReRankerOwl),
+)
+
+@functools.lru_cache(maxsize=None)
+def _classify_reranker(model_name: str) -> type:
+    """maps a model name to its reranker class. cached so the name is lowercased
+    and scanned once per model rather than on every query
+
+    Args:
+        model_name (str): _description_
+
+    Returns:
+        type: one of the ReRanker subclasses
+    """
+    lowered = model_name.lower()
+    for marker, reranker_class in _RERANKER_CLASSIFIERS:
+        if marker in lowered:
+            return reranker_class
+    return ReRankerText
+
+@functools.lru_cache(maxsize=8)
+def _get_reranker(model_name: str, device: str, backend: str = 'torch', num_highlights: int = 1,
+                image_size: Tuple = (240,240), char_cap: int = 512, batch_size: int = 128,
+                precision: str = None, image_batch_size: int = 32, quantize: bool = False) -> ReRankerText:
+    """constructs (or fetches a memoized) reranker instance so warm calls skip
+    the tokenizer/model construction cost
+
+    Args:
+        model_name (str): _description_
+        device (str): _description_
+        backend (str, optional): _description_. Defaults to 'torch'.
+        num_highlights (int, optional): _description_. Defaults to 1.
+        image_size (Tuple, optional): only used for the owl rerankers. Defaults to (240,240).
+        char_cap (int, optional): only used for the text rerankers. Defaults to 512.
+        batch_size (int, optional): only used for the text rerankers. Defaults to 128.
+        precision (str, optional): 'fp16', 'bf16' or 'fp32'. None picks fp16 on cuda
+            and fp32 on cpu. Defaults to None.
+        image_batch_size (int, optional): only used for the owl rerankers. Defaults to 32.
+        quantize (bool, optional): int8 dynamic quantization for the text rerankers,
+            only takes effect on cpu with the torch backend. opt-in because the
+            quantized logits differ from the full-precision ones. Defaults to False.
+
+    Returns:
+        ReRankerText: one of the ReRanker subclasses
+    """
+    # serialise construction so concurrent first calls do not build duplicate
+    # instances. the model weights themselves load lazily on the first rerank,
+    # under the instance's own rerank lock
+    with _reranker_load_lock:
+        if _classify_reranker(model_name) is ReRankerOwl:
+            return ReRankerOwl(model_name=model_name, device=device, image_size=image_size, backend=backend,
+                            precision=precision, image_batch_size=image_batch_size)
+        return ReRankerText(model_name=model_name, device=device, num_highlights=num_highlights, backend=backend,
+                        char_cap=char_cap, batch_size=batch_size, precision=precision, quantize=quantize)
+
+def rerank_search_results(search_result: Dict, query: str, model_name: str, device: str,
+                searchable_attributes: List[str] = None, num_highlights: int = 1,
+                overwrite_original_scores_highlights: bool = True, backend: str = 'torch',
+                char_cap: int = 512, batch_size: int = 128, precision: str = None,
+                image_batch_size: int = 32, quantize: bool = False) -> None:
     """the parent function to handle calling the rerankers. the results are modified in place
 
     Args:
@@ -21,14 +89,35 @@ def rerank_search_results(search_result: Dict, query: str, model_name: str, devi
         searchable_attributes (List[str], optional): _description_. Defaults to None.
         num_highlights (int, optional): _description_. Defaults to 1.
         overwrite_original_scores_highlights (bool, optional): _description_. Defaults to True.
+        backend (str, optional): inference backend for the reranker, one of 'torch',
+            'onnx' or 'openvino'. Defaults to 'torch'.
+        char_cap (int, optional): per-field character cap applied to the candidate content
+            before tokenization so tokenizer work is bounded. None disables. Defaults to 512.
+        batch_size (int, optional): batch size for the text cross-encoder forward. Defaults to 128.
+        precision (str, optional): 'fp16', 'bf16' or 'fp32' for the forward pass.
+            None picks fp16 on cuda and fp32 on cpu. Defaults to None.
+        image_batch_size (int, optional): batch size for the owl image preprocessing. Defaults to 32.
+        quantize (bool, optional): int8 post-training dynamic quantization of the text
+            cross-encoder's linear layers; cpu + torch backend only. opt-in because
+            the quantized scores are not bit-identical to full precision. Defaults to False.
     """
 
+    # convert the attributes to a frozenset once at the boundary so every downstream
+    # membership test is O(1). the original list is kept for the rerankers, where
+    # ordering matters (e.g. owl takes the first attribute)
+    searchable_attributes_set = None if searchable_attributes is None else frozenset(searchable_attributes)
+
     # check the search_results have the searchable attribute before proceeding
     # skip reranking if the results do not contain the field
-    if not _check_searchable_fields_in_results(search_results=search_result, searchable_fields=searchable_attributes):
-        return search_result
+    if not _check_searchable_fields_in_results(search_results=search_result, searchable_fields=searchable_attributes_set):
+        return
 
-    if 'owl' in model_name.lower():
+    # empty or singleton results cannot change order, skip constructing a reranker at all
+    if len(search_result[ResultsFields.hits]) < 2:
+        logger.info("less than two results for re-ranking. returning doing nothing...")
+        return
+
+    if _classify_reranker(model_name) is ReRankerOwl:
         # owl needs the image location, while the text based ones can handle different number of fields but concat the text
         if searchable_attributes in (None, [], (), ''):
             raise RerankerError(f"found searchable_attributes={searchable_attributes} but expected list of strings for {model_name}")
@@ -38,21 +127,254 @@ def rerank_search_results(search_result: Dict, query: str, model_name: str, devi
             searchable_attributes = [searchable_attributes[0]]
 
         try:
-            reranker = ReRankerOwl(model_name=model_name, device=device, image_size=(240,240))
+            reranker = _get_reranker(model_name=model_name, device=device, backend=backend, image_size=(240,240),
+                            precision=precision, image_batch_size=image_batch_size)
             reranker.rerank(query=query, results=search_result, image_attributes=searchable_attributes)
         except (UnidentifiedImageError, RerankerNameError) as e:
             raise RerankerError(message=str(e)) from e
 
     else:
         try:
-            reranker = ReRankerText(model_name=model_name, device=device, num_highlights=num_highlights)
-            reranker.rerank(query=query, results=search_result, searchable_attributes=searchable_attributes)
+            reranker = _get_reranker(model_name=model_name, device=device, backend=backend, num_highlights=num_highlights,
+                            char_cap=char_cap, batch_size=batch_size, precision=precision, quantize=quantize)
+            # the text reranker can write the final key names in its scoring pass,
+            # which makes the separate cleanup walk over the hits unnecessary
+            reranker.rerank(query=query, results=search_result, searchable_attributes=searchable_attributes,
+                            final_key_names=overwrite_original_scores_highlights)
         except Exception as e:
             raise RerankerError(message=str(e)) from e
+        return
 
     if overwrite_original_scores_highlights:
         cleanup_final_reranked_results(search_result)
 
+class _RerankDispatcher:
+    """micro-batches concurrent rerank calls. calls arriving within max_wait_ms
+    of each other (up to max_batch_size) are grouped by reranker, their
+    cross-encoder input pairs are concatenated and run in one fused forward pass,
+    and the scores are scattered back to the waiting callers. this keeps the
+    device saturated under concurrent traffic instead of running many small batches
+    """
+
+    def __init__(self, max_wait_ms: int = 50, max_batch_size: int = 128):
+        self.max_wait_ms = max_wait_ms
+        self.max_batch_size = max_batch_size
+        # queue and drain task per event loop. a process can run several loops
+        # over its lifetime (sequential asyncio.run calls, server restarts) and
+        # a queue binds the loop it was created under, so neither can be shared
+        self._loop_state = {}
+
+    async def submit(self, call_kwargs: Dict):
+        """queues a rerank call and waits for its result
+
+        Args:
+            call_kwargs (Dict): the kwargs of a rerank_search_results call
+
+        Returns:
+            _type_: whatever the equivalent sync call would have returned
+        """
+        loop = asyncio.get_running_loop()
+
+        state = self._loop_state.get(loop)
+        if state is None or state[1].done():
+            queue = asyncio.Queue()
+            state = (queue, loop.create_task(self._drain(queue)))
+            self._loop_state[loop] = state
+            # drop state belonging to loops that are gone
+            self._loop_state = {l: s for l, s in self._loop_state.items()
+                        if l is loop or (l.is_running() and not l.is_closed())}
+        queue = state[0]
+
+        future = loop.create_future()
+        await queue.put((call_kwargs, future))
+        return await future
+
+    async def _drain(self, queue: "asyncio.Queue"):
+        """background task that accumulates queued calls into a batch and processes it
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await queue.get()]
+            deadline = loop.time() + self.max_wait_ms/1000
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout=timeout))
+                except asyncio.TimeoutError:
+                    break
+            # the model forward is a long blocking call, keep it off the event
+            # loop so other coroutines are not stalled for the inference
+            await loop.run_in_executor(None, self._process_batch, batch)
+
+    @staticmethod
+    def _resolve(future, result=None, error: Exception = None) -> None:
+        """resolves an asyncio future from the executor thread. futures are not
+        thread-safe so the assignment is marshalled onto the future's own loop
+
+        Args:
+            future (_type_): _description_
+            result (_type_, optional): _description_. Defaults to None.
+            error (Exception, optional): set as the exception when given. Defaults to None.
+        """
+        def _assign():
+            if future.done():
+                return
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+        try:
+            future.get_loop().call_soon_threadsafe(_assign)
+        except RuntimeError:
+            # the caller's loop closed while we were processing, nothing to notify
+            logger.warning("event loop closed before a rerank result could be delivered")
+
+    def _process_batch(self, batch: List[Tuple]) -> None:
+        """splits a batch of queued calls into fusable text-reranker groups,
+        anything else (owl) falls back to the sync path
+
+        Args:
+            batch (List[Tuple]): list of (call_kwargs, future) pairs
+        """
+        groups = defaultdict(list)
+        for call_kwargs, future in batch:
+            if _classify_reranker(call_kwargs['model_name']) is ReRankerOwl:
+                # owl scoring is per-image so there is nothing to fuse
+                try:
+                    self._resolve(future, rerank_search_results(**call_kwargs))
+                except Exception as e:
+                    self._resolve(future, error=e if isinstance(e, RerankerError) else RerankerError(message=str(e)))
+            else:
+                group_key = (call_kwargs['model_name'], call_kwargs['device'],
+                            call_kwargs.get('backend', 'torch'), call_kwargs.get('num_highlights', 1))
+                groups[group_key].append((call_kwargs, future))
+
+        for group_key, calls in groups.items():
+            self._process_text_group(group_key, calls)
+
+    @staticmethod
+    def _process_text_group(group_key: Tuple, calls: List[Tuple]) -> None:
+        """prepares each call's inputs, runs one fused cross-encoder forward over the
+        concatenated pairs and scatters the scores back per call
+
+        Args:
+            group_key (Tuple): (model_name, device, backend, num_highlights)
+            calls (List[Tuple]): list of (call_kwargs, future) pairs for this reranker
+        """
+        model_name, device, backend, num_highlights = group_key
+        try:
+            _RerankDispatcher._process_text_group_inner(model_name, device, backend, num_highlights, calls)
+        except Exception as e:
+            # nothing may escape with queued futures unresolved, the awaiting
+            # callers would hang forever and the drain task would die with them.
+            # already-resolved futures are skipped by _resolve
+            for _, future in calls:
+                _RerankDispatcher._resolve(future, error=RerankerError(message=str(e)))
+
+    @staticmethod
+    def _process_text_group_inner(model_name: str, device: str, backend: str,
+                        num_highlights: int, calls: List[Tuple]) -> None:
+        reranker = _get_reranker(model_name=model_name, device=device, backend=backend, num_highlights=num_highlights)
+
+        # the reranker instance is shared with concurrent sync callers, hold its
+        # rerank lock across the whole prepare/forward/scatter sequence
+        with reranker._rerank_lock:
+            prepared = []
+            for call_kwargs, future in calls:
+                try:
+                    search_result = call_kwargs['search_result']
+                    if not _check_searchable_fields_in_results(search_results=search_result,
+                                    searchable_fields=call_kwargs.get('searchable_attributes')):
+                        _RerankDispatcher._resolve(future)
+                        continue
+                    if len(search_result[ResultsFields.hits]) < 2:
+                        logger.info("less than two results for re-ranking. returning doing nothing...")
+                        _RerankDispatcher._resolve(future)
+                        continue
+                    if reranker.model is None:
+                        reranker.load_model()
+                    inputs_df = reranker._prepare_rerank_inputs(call_kwargs['query'], search_result,
+                                    call_kwargs.get('searchable_attributes'))
+                    model_inputs = reranker._prepare_inputs(inputs_df)
+                    prepared.append((call_kwargs, future, inputs_df, model_inputs))
+                except Exception as e:
+                    _RerankDispatcher._resolve(future, error=RerankerError(message=str(e)))
+
+            if len(prepared) == 0:
+                return
+
+            # the fused forward pass over all calls' pairs at once
+            fused_inputs = [pair for _,_,_,model_inputs in prepared for pair in model_inputs]
+            try:
+                fused_scores = reranker._predict(fused_inputs)
+            except Exception as e:
+                for _, future, _, _ in prepared:
+                    _RerankDispatcher._resolve(future, error=RerankerError(message=str(e)))
+                return
+
+            # scatter the scores back to the original query boundaries
+            offset = 0
+            for call_kwargs, future, inputs_df, model_inputs in prepared:
+                scores = fused_scores[offset:offset + len(model_inputs)]
+                offset += len(model_inputs)
+                try:
+                    reranker._apply_scores(scores, inputs_df, call_kwargs['search_result'],
+                                final_key_names=call_kwargs.get('overwrite_original_scores_highlights', True))
+                    _RerankDispatcher._resolve(future)
+                except Exception as e:
+                    _RerankDispatcher._resolve(future, error=RerankerError(message=str(e)))
+
+_dispatcher = _RerankDispatcher()
+
+async def rerank_search_results_async(search_result: Dict, query: str, model_name: str, device: str,
+                searchable_attributes: List[str] = None, num_highlights: int = 1,
+                overwrite_original_scores_highlights: bool = True, backend: str = 'torch') -> None:
+    """async variant of rerank_search_results. concurrent callers are micro-batched
+    through a shared dispatcher so their cross-encoder passes are fused into one
+    forward. the results are modified in place, same as the sync entry point
+
+    Args:
+        see rerank_search_results
+    """
+    return await _dispatcher.submit({
+        'search_result': search_result,
+        'query': query,
+        'model_name': model_name,
+        'device': device,
+        'searchable_attributes': searchable_attributes,
+        'num_highlights': num_highlights,
+        'overwrite_original_scores_highlights': overwrite_original_scores_highlights,
+        'backend': backend,
+    })
+
+def _build_text_pairs(hits: List[Dict], searchable_attributes: List[str], query: str) -> Tuple[List[str], List[str]]:
+    """builds the parallel (queries, docs) lists for the cross-encoder in one pass,
+    without going through the dataframe formatting. each hit's searchable fields are
+    fused into a single document string
+
+    Args:
+        hits (List[Dict]): the hits list from the search result
+        searchable_attributes (List[str]): fields to fuse, None means all non _ fields
+        query (str): _description_
+
+    Returns:
+        Tuple[List[str], List[str]]: (queries, docs) of equal length to hits
+    """
+    if searchable_attributes is None:
+        docs = [" ".join(str(content) for field, content in r.items() if not field.startswith('_')) for r in hits]
+    else:
+        fields = tuple(searchable_attributes)
+        if len(fields) == 1:
+            # single-field fast path, no join or inner generator per hit
+            field = fields[0]
+            docs = [str(r.get(field, '') or '') for r in hits]
+        else:
+            # generator feeding str.join avoids the throwaway per-hit list
+            docs = [" ".join(str(r.get(f, '') or '') for f in fields) for r in hits]
+    return [query]*len(docs), docs
+
 def _check_searchable_fields_in_results(search_results: Dict, searchable_fields: List[str] = None) -> bool:
     """
     checks the searchable fileds are in the search result
@@ -68,7 +390,11 @@ def _check_searchable_fields_in_results(search_results: Dict, searchable_fields:
 
     if searchable_fields == None:
         return True
-    return any([True for r in search_results[ResultsFields.hits] if any(s in r for s in searchable_fields)])
+    # frozenset + isdisjoint keeps the membership tests in C and the generator
+    # lets any() short-circuit on the first hit that has one of the fields
+    if not isinstance(searchable_fields, frozenset):
+        searchable_fields = frozenset(searchable_fields)
+    return any(not searchable_fields.isdisjoint(r) for r in search_results[ResultsFields.hits])
     
 def cleanup_final_reranked_results(reranked_results: Dict) -> None:
     """removes the fields that were created for the reranking process
@@ -76,18 +402,26 @@ def cleanup_final_reranked_results(reranked_results: Dict) -> None:
     Args:
         reranked_results (Dict[List]): _description_
     """
+    if not reranked_results.get(ResultsFields.hits):
+        return
+
+    # bind the field names to locals once, the class attribute lookups are
+    # redundant work inside the loop when there are thousands of hits
+    reranker_score = ResultsFields.reranker_score
+    original_score = ResultsFields.original_score
+    highlights_reranked = ResultsFields.highlights_reranked
+    highlights = ResultsFields.highlights
+    reranked_id = ResultsFields.reranked_id
+
     for result in reranked_results[ResultsFields.hits]:
         # replace original with reranked score
         # could also do a hybrid score
-        if ResultsFields.reranker_score in result:
-            result[ResultsFields.original_score] = result[ResultsFields.reranker_score]
-            del result[ResultsFields.reranker_score]
+        if reranker_score in result:
+            result[original_score] = result.pop(reranker_score)
 
         # replace highlights with reranked highlights
-        if ResultsFields.highlights_reranked in result:
-            result[ResultsFields.highlights] = result[ResultsFields.highlights_reranked]
-            del result[ResultsFields.highlights_reranked]
-        
+        if highlights_reranked in result:
+            result[highlights] = result.pop(highlights_reranked)
+
         # remove our own internal id from the reranking process
-        if ResultsFields.reranked_id in result:
-            del result[ResultsFields.reranked_id]
+        result.pop(reranked_id, None)
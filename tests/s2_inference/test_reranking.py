@@ -238,6 +238,146 @@ class TestReranking(unittest.TestCase):
         assert all( '_reranked_score' not in doc for doc in results_lexical['hits'])
 
 
+    def test_check_searchable_fields_in_results(self):
+
+        results_lexical = {'hits':
+                    [{'attributes': 'yello head. pruple shirt. black sweater.',
+                        'location': 'images/1.png',
+                        '_score': 1.4017934,
+                        '_highlights': [],
+                        },
+                        {'other': 'some more text',
+                        '_id': 'QmRR6PBkgCdhiSYBM3AY3EWhn4ZbeR2X8Ygpy2veLkcPC5',
+                        '_score': 0.2876821,
+                        '_highlights': [],
+                        }],
+                        'processingTimeMs': 49,
+                        'query': 'yellow turtleneck',
+                        'limit': 10}
+
+        # None means no filtering and is allowed
+        assert rerank._check_searchable_fields_in_results(results_lexical, None)
+
+        # at least one hit has the field
+        assert rerank._check_searchable_fields_in_results(results_lexical, ['location'])
+        assert rerank._check_searchable_fields_in_results(results_lexical, ['other', 'missing'])
+
+        # no hit has the field
+        assert not rerank._check_searchable_fields_in_results(results_lexical, ['missing'])
+        assert not rerank._check_searchable_fields_in_results({'hits': []}, ['location'])
+
+    def test_build_text_pairs(self):
+
+        hits = [{'attributes': 'yello head.', 'location': 'images/1.png', '_score': 1.4},
+                {'other': 'some more text', '_id': 'abc', '_score': 0.28}]
+
+        queries, docs = rerank._build_text_pairs(hits, ['attributes', 'other'], 'hello')
+
+        assert queries == ['hello', 'hello']
+        assert docs == ['yello head. ', ' some more text']
+
+        # single field takes the no-join fast path
+        queries, docs = rerank._build_text_pairs(hits, ['attributes'], 'hello')
+
+        assert queries == ['hello', 'hello']
+        assert docs == ['yello head.', '']
+
+        # None means all non marqo fields get fused
+        queries, docs = rerank._build_text_pairs(hits, None, 'hello')
+
+        assert queries == ['hello', 'hello']
+        assert docs == ['yello head. images/1.png', 'some more text']
+
+    def test_rerank_pairs(self):
+
+        results = {'hits':
+                    [{'attributes': 'yello head. pruple shirt.', '_score': 1.4, '_highlights': []},
+                     {'attributes': 'face is viking.', '_id': 'abc', '_score': 0.28, '_highlights': []}]}
+
+        rr = ReRankerText('_testing', 'cpu')
+        pairs = rerank._build_text_pairs(results['hits'], ['attributes'], 'hello')
+        rr.rerank_pairs('hello', results, pairs)
+
+        assert all( isinstance(doc['_reranked_score'], (int, float)) for doc in results['hits'])
+
+        # the fast path keeps the original highlights
+        assert all( doc['_highlights'] == [] for doc in results['hits'])
+
+        all_scores = [doc['_reranked_score'] for doc in results['hits']]
+        assert all( s1 >= s2 for s1,s2 in zip(all_scores[:-1], all_scores[1:]))
+
+    def test_rerank_cached_query(self):
+
+        rr = ReRankerText('_testing', 'cpu')
+
+        docs = ['yello head. pruple shirt.', 'face is viking.', 'some more text']
+        scores = rr.rerank_cached_query('hello', docs)
+
+        assert len(scores) == len(docs)
+        assert all( isinstance(s, (int, float)) for s in scores)
+
+        # the char cap applies to the model inputs only, the docs are untouched
+        rr_capped = ReRankerText('_testing', 'cpu', char_cap=5)
+        scores = rr_capped.rerank_cached_query('hello', docs)
+
+        assert len(scores) == len(docs)
+        assert docs[0] == 'yello head. pruple shirt.'
+
+    def test_rerank_dispatcher(self):
+
+        import asyncio
+
+        template = {'hits':
+                    [{'attributes': 'yello head. pruple shirt.', '_score': 1.4, '_highlights': []},
+                     {'attributes': 'face is viking.', '_id': 'abc', '_score': 0.28, '_highlights': []}]}
+
+        results_a = copy.deepcopy(template)
+        results_b = copy.deepcopy(template)
+
+        # concurrent calls in one loop get micro-batched through the dispatcher
+        async def _run():
+            await asyncio.gather(
+                rerank.rerank_search_results_async(results_a, 'hello', '_testing', 'cpu'),
+                rerank.rerank_search_results_async(results_b, 'hello', '_testing', 'cpu'))
+
+        asyncio.run(_run())
+
+        for results in (results_a, results_b):
+            assert all( isinstance(doc['_score'], (int, float)) for doc in results['hits'])
+            all_scores = [doc['_score'] for doc in results['hits']]
+            assert all( s1 >= s2 for s1,s2 in zip(all_scores[:-1], all_scores[1:]))
+
+        # a later loop (second asyncio.run) must get its own queue and drain task
+        results_c = copy.deepcopy(template)
+        asyncio.run(rerank.rerank_search_results_async(results_c, 'hello', '_testing', 'cpu'))
+
+        assert all( isinstance(doc['_score'], (int, float)) for doc in results_c['hits'])
+
+    def test_classify_reranker(self):
+
+        from marqo.s2_inference.reranking.cross_encoders import ReRankerOwl
+
+        assert rerank._classify_reranker('google/owlvit-base-patch32') is ReRankerOwl
+        assert rerank._classify_reranker('owl/ViT-B/32') is ReRankerOwl
+
+        # everything else goes to the text reranker
+        assert rerank._classify_reranker('_testing') is ReRankerText
+        assert rerank._classify_reranker('cross-encoder/ms-marco-TinyBERT-L-2') is ReRankerText
+
+    def test_top_k_indices(self):
+
+        from marqo.s2_inference.reranking._numba_topk import top_k_indices
+
+        scores = [0.1, 0.9, 0.5, 0.7]
+
+        # full descending ordering
+        assert top_k_indices(scores).tolist() == [1, 3, 2, 0]
+        assert top_k_indices(scores, 10).tolist() == [1, 3, 2, 0]
+
+        # bounded selection
+        assert top_k_indices(scores, 2).tolist() == [1, 3]
+        assert top_k_indices(scores, 0).tolist() == []
+
     def test_rerank(self):
 
         results_lexical = {'hits': 
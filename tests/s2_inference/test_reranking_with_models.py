@@ -153,6 +153,29 @@ class TestRerankingWithModels(unittest.TestCase):
 
             assert abs(onnx['_score'] - sbert['_score']) < 1e-6
 
+    def test_score_query_docs_parity(self):
+        # the tokenize-once scoring core must reproduce the CrossEncoder.predict
+        # scores, including the segment ids the bert-family models are trained with
+
+        from marqo.s2_inference.reranking.cross_encoders import ReRankerText
+
+        model_name = 'cross-encoder/ms-marco-TinyBERT-L-2'
+        rr = ReRankerText(model_name, 'cpu')
+        rr.load_model()
+
+        query = 'yellow turtleneck'
+        docs = ['yello head. pruple shirt. black sweater.',
+                'face is viking. body is white turtleneck. background is pearl',
+                'some more text']
+
+        fast_scores = rr._score_query_docs(query, docs)
+        reference_scores = rr.model.predict([[query, doc] for doc in docs], batch_size=rr.batch_size)
+
+        assert len(fast_scores) == len(docs)
+
+        for fast, reference in zip(fast_scores, reference_scores):
+            assert abs(fast - reference) < 1e-6
+
     def test_reranking_images_owl_inconsistent(self):
         # not all results have the searchable filed to rerank over
         results_lexical = {'hits': 